@@ -1,15 +1,23 @@
+import asyncio
+import logging
 import pandas as pd
 from datetime import datetime, timedelta
-from ib_async import IB
-from trade_rec_v2 import compute_recommendation
+from ib_pool import get_ib, disconnect
+from trade_rec_v2 import compute_recommendations
 from notifications.notifier import GmailEmailer
 
-def main():
-    # Read CSV
-    df = pd.read_csv("data/oquants_earnings_calendar.csv")
+logger = logging.getLogger(__name__)
+
+async def main():
+    # Read CSV - only the columns we filter on; announcement_time is just amc/bmo
+    df = pd.read_csv(
+        "data/oquants_earnings_calendar.csv",
+        usecols=['ticker', 'announcement_date', 'announcement_time'],
+        dtype={'announcement_time': 'category'}
+    )
     
-    # Convert announcement_date to datetime, then to date
-    df['announcement_date'] = pd.to_datetime(df['announcement_date'], format='%Y-%m-%d').dt.date
+    # Convert announcement_date to datetime64 (kept vectorized, no per-row date objects)
+    df['announcement_date'] = pd.to_datetime(df['announcement_date'], format='%Y-%m-%d', cache=True)
     
     # Get today
     today = datetime.now().date()
@@ -25,8 +33,8 @@ def main():
     print(f"Looking for: Today ({today}) AMC and {bmo_date} BMO")
     
     # Filter tickers
-    today_amc = df[(df['announcement_date'] == today) & (df['announcement_time'] == 'amc')]['ticker'].tolist()
-    bmo_tickers = df[(df['announcement_date'] == bmo_date) & (df['announcement_time'] == 'bmo')]['ticker'].tolist()
+    today_amc = df[(df['announcement_date'] == pd.Timestamp(today)) & (df['announcement_time'] == 'amc')]['ticker'].tolist()
+    bmo_tickers = df[(df['announcement_date'] == pd.Timestamp(bmo_date)) & (df['announcement_time'] == 'bmo')]['ticker'].tolist()
     
     print(f"Today AMC: {today_amc}")
     print(f"{bmo_date} BMO: {bmo_tickers}")
@@ -39,29 +47,29 @@ def main():
     
     print(f"Processing {len(all_tickers)} tickers: {all_tickers}")
     
-    # Connect to IB
-    ib = IB()
-    ib.connect('127.0.0.1', 4001)
+    # Connect to IB (reuses the connection if one is already open on this event loop)
+    ib = await get_ib()
     
     results = []
     error_details = {}  # Changed to dict to store error details
     
-    # Process each ticker
-    for ticker in all_tickers:
-        try:
-            print(f"Processing {ticker}...")
-            result = compute_recommendation(ticker, ib)
-            if result:  # Check if result is not None
-                result['ticker'] = ticker
-                results.append(result)
-            else:
-                error_details[ticker] = "Unknown error (function returned None)"
-        except Exception as e:
-            print(f"Error processing {ticker}: {e}")
-            error_details[ticker] = str(e)
-    
-    # Disconnect from IB
-    ib.disconnect()
+    # Process all tickers as one concurrent batch
+    try:
+        recommendations = await compute_recommendations(all_tickers, ib)
+    except Exception as e:
+        logger.error("Error processing tickers: %s", e)
+        recommendations = {ticker: None for ticker in all_tickers}
+        error_details = {ticker: str(e) for ticker in all_tickers}
+    finally:
+        # Disconnect from IB while the event loop is still running, even if the batch was cancelled
+        disconnect()
+    
+    for ticker, result in recommendations.items():
+        if result:  # Check if result is not None
+            result['ticker'] = ticker
+            results.append(result)
+        elif ticker not in error_details:
+            error_details[ticker] = "Unknown error (function returned None)"
     
     # Create results DataFrame
     results_df = pd.DataFrame(results)
@@ -116,4 +124,8 @@ def main():
     print("Email sent!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,66 @@
+"""
+Shared IB connection for the calendar spread scripts
+
+The first caller connects; later callers on the same event loop reuse the
+connection instead of paying for another handshake. The connection is tied
+to the event loop it was made on, so call disconnect() before that loop
+ends (e.g. in a finally inside the coroutine passed to asyncio.run).
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from ib_async import IB
+
+logger = logging.getLogger(__name__)
+
+IB_HOST = '127.0.0.1'
+IB_PORT = 4001  # 4001 is the default port for IB Gateway, 7497 for TWS
+
+_ib: Optional[IB] = None
+_lock: Optional[asyncio.Lock] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def get_ib(host: str = IB_HOST, port: int = IB_PORT, client_id: int = 1) -> IB:
+    """
+    Get the IB connection shared by everything on the running event loop,
+    connecting it if needed
+
+    Args:
+        host: IB Gateway / TWS host
+        port: IB Gateway / TWS port
+        client_id: Client id used when a new connection has to be made
+
+    Returns:
+        Connected IB instance
+    """
+    global _ib, _lock, _loop
+
+    # A connection (and lock) from an earlier asyncio.run can't be used on this
+    # loop, so start fresh whenever the loop changes
+    loop = asyncio.get_running_loop()
+    if loop is not _loop:
+        _ib = None
+        _lock = asyncio.Lock()
+        _loop = loop
+
+    async with _lock:
+        if _ib is None:
+            _ib = IB()
+        if not _ib.isConnected():
+            await _ib.connectAsync(host, port, clientId=client_id)
+            logger.info("Connected to IB at %s:%d (clientId=%d)", host, port, client_id)
+
+    return _ib
+
+
+def disconnect() -> None:
+    """
+    Disconnect the shared IB connection if it is open; call it while its
+    event loop is still running
+    """
+    if _ib is not None and _ib.isConnected():
+        _ib.disconnect()
+        logger.info("Disconnected from IB")
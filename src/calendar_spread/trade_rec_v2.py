@@ -1,15 +1,29 @@
-from datetime import datetime, timedelta
-from scipy.interpolate import interp1d
+from datetime import datetime, time as dt_time
+import asyncio
+import logging
+import math
 import numpy as np
 import pandas as pd
 import pytz
 
 from ib_async import *
+from ib_pool import get_ib, disconnect
 
-def get_daily_price_history(symbol, n_days, ib):
-    contract = Stock(symbol, 'SMART', 'USD')
+logger = logging.getLogger(__name__)
 
-    bars = ib.reqHistoricalData(
+# Max tickers worked on at once; keeps us well under IB's pacing limits
+MAX_CONCURRENT_TICKERS = 6
+
+# Regular session, US/Eastern
+ET = pytz.timezone('US/Eastern')
+MARKET_OPEN = dt_time(9, 30)
+MARKET_CLOSE = dt_time(16, 0)
+
+async def get_daily_price_history(contract, n_days, ib):
+    """
+    contract - qualified Stock contract (reused so IB doesn't resolve it again)
+    """
+    bars = await ib.reqHistoricalDataAsync(
         contract=contract, 
         endDateTime="", 
         durationStr=f"{n_days} D", 
@@ -24,10 +38,23 @@ def get_daily_price_history(symbol, n_days, ib):
 
 def is_market_hours():
    """Check if current time is between 9:30 AM and 4:00 PM ET."""
-   et = pytz.timezone('US/Eastern')
-   now = datetime.now(et)
-   return now.time() >= datetime.strptime('09:30', '%H:%M').time() and \
-          now.time() <= datetime.strptime('16:00', '%H:%M').time()
+   now = datetime.now(ET).time()
+   return MARKET_OPEN <= now <= MARKET_CLOSE
+
+def _ffill(values):
+    """
+    Forward-fills NaNs down each column of a 2-D array
+    """
+    idx = np.where(np.isnan(values), 0, np.arange(len(values))[:, None])
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return values[idx, np.arange(values.shape[1])]
+
+def _rolling_sum(values, window):
+    """
+    Sums over every full trailing window of a 1-D array (len(values) - window + 1 sums)
+    """
+    cumsum = np.concatenate(([0.0], np.cumsum(values)))
+    return cumsum[window:] - cumsum[:-window]
 
 def yang_zhang(price_data, window=30, trading_periods=252, return_last_only=True):
     """
@@ -37,49 +64,44 @@ def yang_zhang(price_data, window=30, trading_periods=252, return_last_only=True
     """
     # Check for sufficient data
     if len(price_data) < window + 1:
-        print(f"Warning: Not enough data for Yang-Zhang calculation. Need {window+1}, got {len(price_data)}")
+        logger.warning("Not enough data for Yang-Zhang calculation. Need %d, got %d", window + 1, len(price_data))
         return np.nan
         
+    ohlc = price_data[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64)
+
     # Check for missing data and fill if necessary
-    if price_data['high'].isna().any() or price_data['low'].isna().any() or \
-       price_data['open'].isna().any() or price_data['close'].isna().any():
+    if np.isnan(ohlc).any():
         # Fill missing values with forward fill then backward fill
-        price_data = price_data.fillna(method='ffill').fillna(method='bfill')
+        ohlc = _ffill(_ffill(ohlc)[::-1])[::-1]
 
-    log_ho = (price_data['high'] / price_data['open']).apply(np.log)
-    log_lo = (price_data['low'] / price_data['open']).apply(np.log)
-    log_co = (price_data['close'] / price_data['open']).apply(np.log)
-    
-    log_oc = (price_data['open'] / price_data['close'].shift(1)).apply(np.log)
-    log_oc_sq = log_oc**2
+    if return_last_only:
+        # only the final window is needed, so skip the earlier bars
+        ohlc = ohlc[-(window + 1):]
+
+    open_, high, low, close = ohlc.T
+
+    log_ho = np.log(high / open_)
+    log_lo = np.log(low / open_)
+    log_co = np.log(close / open_)
     
-    log_cc = (price_data['close'] / price_data['close'].shift(1)).apply(np.log)
-    log_cc_sq = log_cc**2
+    # overnight and close-to-close returns start at the second bar
+    log_oc_sq = np.log(open_[1:] / close[:-1])**2
+    log_cc_sq = np.log(close[1:] / close[:-1])**2
     
     rs = log_ho * (log_ho - log_co) + log_lo * (log_lo - log_co)
     
-    close_vol = log_cc_sq.rolling(
-        window=window,
-        center=False
-    ).sum() * (1.0 / (window - 1.0))
-
-    open_vol = log_oc_sq.rolling(
-        window=window,
-        center=False
-    ).sum() * (1.0 / (window - 1.0))
-
-    window_rs = rs.rolling(
-        window=window,
-        center=False
-    ).sum() * (1.0 / (window - 1.0))
+    # element i of each rolling sum covers bars i+1 .. i+window
+    close_vol = _rolling_sum(log_cc_sq, window) * (1.0 / (window - 1.0))
+    open_vol = _rolling_sum(log_oc_sq, window) * (1.0 / (window - 1.0))
+    window_rs = _rolling_sum(rs[1:], window) * (1.0 / (window - 1.0))
 
     k = 0.34 / (1.34 + ((window + 1) / (window - 1)) )
-    result = (open_vol + k * close_vol + (1 - k) * window_rs).apply(np.sqrt) * np.sqrt(trading_periods)
+    result = np.sqrt(open_vol + k * close_vol + (1 - k) * window_rs) * np.sqrt(trading_periods)
 
     if return_last_only:
-        return result.iloc[-1]
+        return result[-1]
     else:
-        return result.dropna()
+        return pd.Series(result, index=price_data.index[window:]).dropna()
 
 # def build_term_structure(days, ivs):
 #     days = np.array(days)
@@ -125,17 +147,25 @@ def build_term_structure(days, ivs):
         constant_iv = ivs[0]
         return lambda dte: constant_iv
     
-    spline = interp1d(days, ivs, kind='linear', fill_value="extrapolate")
+    # np.interp clamps to the end values outside [days[0], days[-1]]
+    return lambda dte: np.interp(dte, days, ivs)
 
-    def term_spline(dte):
-        if dte < days[0]:  
-            return ivs[0]
-        elif dte > days[-1]:
-            return ivs[-1]
-        else:  
-            return float(spline(dte))
+def _interp_extrapolate(x, xp, fp):
+    """
+    Piecewise linear interpolation that extends the end segments past the data,
+    the same as interp1d(xp, fp, kind='linear', fill_value="extrapolate").
+    xp must be increasing.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    xp = np.asarray(xp, dtype=np.float64)
+    fp = np.asarray(fp, dtype=np.float64)
 
-    return term_spline
+    y = np.interp(x, xp, fp)
+    below = x < xp[0]
+    above = x > xp[-1]
+    y[below] = fp[0] + (x[below] - xp[0]) * (fp[1] - fp[0]) / (xp[1] - xp[0])
+    y[above] = fp[-1] + (x[above] - xp[-1]) * (fp[-1] - fp[-2]) / (xp[-1] - xp[-2])
+    return y
 
 def middle_six(lst):
     """
@@ -143,43 +173,28 @@ def middle_six(lst):
     If list has < 6 elements, return the original list.
     If list length is odd, remove one extra element from the rear.
     """
-    if len(lst) <= 6:
+    n = len(lst)
+    if n <= 6:
         return lst
     
-    # Calculate how many elements to remove from each end
-    excess = len(lst) - 6
-    front_remove = excess // 2
-    back_remove = excess - front_remove  # This handles the odd case
+    # Remove half the excess from the front; an odd extra comes off the rear
+    front, extra = divmod(n - 6, 2)
+    return lst[front:n - front - extra]
     
-    # Slice the list
-    return lst[front_remove:len(lst) - back_remove]
-    
-def compute_recommendation(ticker_symbol, ib):
+async def _recommendation_for_stock(stock, current_price, ib):
+    """
+    Compute the recommendation for one qualified stock given its current price.
+    Returns None if anything fails.
+    """
+    ticker_symbol = stock.symbol
     try:
-        print(f"computing recommendation for {ticker_symbol}")
-        stock = Stock(ticker_symbol, 'SMART', 'USD')
-        ib.qualifyContracts(stock) # make sure that the contract is valid
-
-        # set data type
-        '''
-        Market Data Types
-        Type	     Code	    Description
-        Live	        1	    Real-time streaming data (requires market data subscription).
-        Frozen	        2	    Last data recorded at market close (useful when markets are closed).
-        Delayed	        3	    Data delayed by 15-20 minutes (for users without live data subscriptions).
-        Delayed Frozen	4	    Last available delayed data at market close (for users without live data subscriptions).
-        '''
-        data_type = 3 if is_market_hours() else 2
-        ib.reqMarketDataType(data_type)
-        print(f"Market data received for {ticker_symbol}")
-
-        # get 'ticker' and current price of the stock
-        ticker = ib.reqTickers(stock)[0]    
-        current_price = ticker.marketPrice()    
+        logger.info("Computing recommendation for %s", ticker_symbol)
+        if current_price is None or not math.isfinite(current_price):
+            raise Exception(f"Can't compute recommendation for {ticker_symbol}. No valid market price: {current_price}")
 
         # Get options chain
-        chains = ib.reqSecDefOptParams(stock.symbol, '', stock.secType, stock.conId)
-        print(f"Options chain received for {ticker_symbol}")
+        chains = await ib.reqSecDefOptParamsAsync(stock.symbol, '', stock.secType, stock.conId)
+        logger.debug("Options chain received for %s", ticker_symbol)
         
         # Can display df for debug visualization purposes
         # chains_df = util.df(chains)
@@ -189,44 +204,50 @@ def compute_recommendation(ticker_symbol, ib):
 
         # filter out irrelevant chains
         strikes = middle_six([strike for strike in chain.strikes if 0.8 * current_price < strike < current_price * 1.2])
-        today_plus_45 = datetime.today() + timedelta(days=45)
-        expirations = sorted(exp for exp in chain.expirations if datetime.strptime(exp, "%Y%m%d") < today_plus_45)
+        # parse every expiration in one vectorized pass and keep those within 45 days
+        today = datetime.today().date()
+        all_expirations = np.array(sorted(chain.expirations))
+        all_exp_dates = pd.to_datetime(all_expirations, format="%Y%m%d").values.astype('datetime64[D]')
+        all_dtes = (all_exp_dates - np.datetime64(today, 'D')).astype(int)
+        within_45 = all_dtes <= 45
+        expirations = all_expirations[within_45].tolist()
+        expiration_dtes = all_dtes[within_45]
         if len(expirations) < 2:
             raise Exception(f"Can't compute recommendation for {ticker_symbol}. Not enough expirations found: {expirations}")
     
         rights = ['P', 'C']
         
-        today = datetime.today().date()
+        # the atm strike doesn't depend on the expiration, so find it once
+        strikes_arr = np.asarray(strikes, dtype=np.float64)
+        atm_strike = strikes[int(np.argmin(np.abs(strikes_arr - current_price)))]
+
+        # build the ATM call and put for every expiration up front
+        atm_legs = []
+        for expiration in expirations:
+            # build call and put contracts w exp and strike
+            atm_call_contract = Option(ticker_symbol, expiration, atm_strike, 'C', 'SMART', tradingClass=ticker_symbol)
+            atm_put_contract = Option(ticker_symbol, expiration, atm_strike, 'P', 'SMART', tradingClass=ticker_symbol)
+            atm_legs += [atm_call_contract, atm_put_contract]
+
+        # fill in all details of every leg including conId, then quote them all, one request each
+        qualified_legs = await ib.qualifyContractsAsync(*atm_legs)
+        if len(qualified_legs) != len(atm_legs):
+            raise Exception(f"Can't compute recommendation for {ticker_symbol}. Only {len(qualified_legs)} of {len(atm_legs)} ATM options qualified")
+        
+        # compute iv - avg of P and C iv
+        '''
+        The option greeks are available from the modelGreeks attribute, and if there is a bid, ask resp. 
+        last price available also from bidGreeks, askGreeks and lastGreeks. For streaming ticks the greek 
+        values will be kept up to date to the current market situation.'''
+        leg_tickers = await ib.reqTickersAsync(*qualified_legs)
+
         dtes = []
         ivs = []
         straddle = None 
         for i, expiration in enumerate(expirations):
-            print(f"Processing expiration {i+1} of {len(expirations)}: {expiration} for {ticker_symbol}")
-            exp_date_obj = datetime.strptime(expiration, "%Y%m%d").date()
-            days_to_expiry = (exp_date_obj - today).days
-                    
-            # find all the calls at the given expiration
-            all_calls_exp = [
-                Option(ticker_symbol, expiration, strike, 'C', 'SMART', tradingClass=ticker_symbol)
-                for strike in strikes
-            ]
-            # find the call contract that is atm
-            atm_strike_idx = (pd.Series([c.strike for c in all_calls_exp]) - current_price).abs().idxmin()
-            atm_call_contract = all_calls_exp[atm_strike_idx]
-            # build put contract w exp and strike
-            atm_put_contract = Option(ticker_symbol, expiration, atm_call_contract.strike, 'P', 'SMART', tradingClass=ticker_symbol)
-            
-            # fill in all details of the contract including conId
-            atm_call_contract = ib.qualifyContracts(atm_call_contract)[0]
-            atm_put_contract = ib.qualifyContracts(atm_put_contract)[0]
-           
-            # compute iv - avg of P and C iv
-            '''
-            The option greeks are available from the modelGreeks attribute, and if there is a bid, ask resp. 
-            last price available also from bidGreeks, askGreeks and lastGreeks. For streaming ticks the greek 
-            values will be kept up to date to the current market situation.'''
-            atm_call_ticker = ib.reqTickers(atm_call_contract)[0]
-            atm_put_ticker = ib.reqTickers(atm_put_contract)[0]
+            logger.debug("Processing expiration %d of %d: %s for %s", i + 1, len(expirations), expiration, ticker_symbol)
+            days_to_expiry = int(expiration_dtes[i])
+            atm_call_ticker, atm_put_ticker = leg_tickers[2 * i], leg_tickers[2 * i + 1]
             
             atm_iv_value = (atm_call_ticker.modelGreeks.impliedVol + atm_put_ticker.modelGreeks.impliedVol) / 2.0
             
@@ -238,15 +259,21 @@ def compute_recommendation(ticker_symbol, ib):
             dtes.append(days_to_expiry)
             ivs.append(atm_iv_value)   
 
-        term_spline = interp1d(dtes, ivs, kind='linear', fill_value="extrapolate")
-        ts_slope_0_45 = (term_spline(45) - term_spline(dtes[0])) / (45-dtes[0])
+        # evaluate the term structure at every point we need in one call
+        # (dtes are increasing since expirations are sorted and unique)
+        iv_front, iv_30, iv_45 = _interp_extrapolate([dtes[0], 30, 45], dtes, ivs)
+        ts_slope_0_45 = (iv_45 - iv_front) / (45-dtes[0])
 
-        price_data = get_daily_price_history(ticker_symbol, 31, ib)
+        price_data = await get_daily_price_history(stock, 31, ib)
         realized_vol = yang_zhang(price_data, window=30, trading_periods=252, return_last_only=True)
-        iv30_rv30 = term_spline(30) / realized_vol
-        avg_volume = price_data['volume'].rolling(30).mean().dropna().iloc[-1]
+        iv30_rv30 = iv_30 / realized_vol
+        # only the last 30-day window is used, so average just those values
+        volume = price_data['volume'].to_numpy(dtype=np.float64)
+        if len(volume) < 30:
+            raise Exception(f"Can't compute recommendation for {ticker_symbol}. Only {len(volume)} days of volume history")
+        avg_volume = float(volume[-30:].mean())
         expected_move = str(round(straddle / current_price * 100,2)) + "%" if straddle else None
-        print("Recommendation computed successfully")
+        logger.info("Recommendation computed for %s", ticker_symbol)
         return {
             'avg_volume': avg_volume >= 1500000, 
             'iv30_rv30': iv30_rv30 >= 1.25, 
@@ -255,18 +282,69 @@ def compute_recommendation(ticker_symbol, ib):
             'current_price': current_price,
         }
     except Exception as e:
-        print(f"Error processing {ticker_symbol}: {e}")
+        logger.error("Error processing %s: %s", ticker_symbol, e)
         return None
+
+async def compute_recommendations(ticker_symbols, ib, max_concurrent=MAX_CONCURRENT_TICKERS):
+    """
+    Compute recommendations for a batch of tickers.
+
+    All stock contracts are qualified in one qualifyContracts call and quoted in
+    one reqTickers call; the per-ticker option chain work then runs concurrently,
+    at most max_concurrent tickers at a time.
+
+    Returns a dict mapping each ticker to its recommendation dict, or None on failure.
+    """
+    stocks = [Stock(ticker_symbol, 'SMART', 'USD') for ticker_symbol in ticker_symbols]
+    await ib.qualifyContractsAsync(*stocks) # make sure that the contracts are valid
+
+    # set data type
+    '''
+    Market Data Types
+    Type	     Code	    Description
+    Live	        1	    Real-time streaming data (requires market data subscription).
+    Frozen	        2	    Last data recorded at market close (useful when markets are closed).
+    Delayed	        3	    Data delayed by 15-20 minutes (for users without live data subscriptions).
+    Delayed Frozen	4	    Last available delayed data at market close (for users without live data subscriptions).
+    '''
+    data_type = 3 if is_market_hours() else 2
+    ib.reqMarketDataType(data_type)
+
+    # get 'tickers' and current prices of every valid stock in a single request
+    qualified = [stock for stock in stocks if stock.conId]
+    tickers = await ib.reqTickersAsync(*qualified) if qualified else []
+    prices = {ticker.contract.conId: ticker.marketPrice() for ticker in tickers}
+    logger.debug("Market data received for %d of %d tickers", len(tickers), len(stocks))
+
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def run(ticker_symbol, stock):
+        if not stock.conId:
+            logger.error("Error processing %s: contract could not be qualified", ticker_symbol)
+            return ticker_symbol, None
+        async with semaphore:
+            return ticker_symbol, await _recommendation_for_stock(stock, prices.get(stock.conId), ib)
+
+    results = await asyncio.gather(*(run(ticker_symbol, stock) for ticker_symbol, stock in zip(ticker_symbols, stocks)))
+    return dict(results)
+
+async def compute_recommendation(ticker_symbol, ib):
+    """
+    Single-ticker wrapper around compute_recommendations
+    """
+    return (await compute_recommendations([ticker_symbol], ib))[ticker_symbol]
     
-def main():
+async def main():
     """
     Example usage of the compute_recommendation function
     """
-    ib = IB()
-    ib.connect('127.0.0.1', 4001, clientId=10) # 4001 is the default port for IB Gateway, 7497 for TWS
-    ticker_symbol = 'AAPL'  # Example ticker symbol
-    recommendation = compute_recommendation(ticker_symbol, ib)
-    if recommendation:
-        print(f"Recommendation for {ticker_symbol}: {recommendation}")
-    else:
-        print(f"Failed to compute recommendation for {ticker_symbol}")
\ No newline at end of file
+    ib = await get_ib(client_id=10)
+    try:
+        ticker_symbol = 'AAPL'  # Example ticker symbol
+        recommendation = await compute_recommendation(ticker_symbol, ib)
+        if recommendation:
+            print(f"Recommendation for {ticker_symbol}: {recommendation}")
+        else:
+            print(f"Failed to compute recommendation for {ticker_symbol}")
+    finally:
+        disconnect()
\ No newline at end of file
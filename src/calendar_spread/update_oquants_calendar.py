@@ -1,13 +1,64 @@
 import requests
 import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
+import base64
 import json
+import os
+import time
+
+EARNINGS_CALENDAR_URL = "https://api.oquants.com/api/v1/dashboard/earnings/earnings-calendar"
+BASE_HEADERS = {
+    'Referer': 'https://oquants.com/',
+    'User-Agent': 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:138.0) Gecko/20100101 Firefox/138.0'
+}
+TOKEN_CACHE_PATH = os.path.expanduser("~/.cache/oquants_token.json")
+TOKEN_EXPIRY_MARGIN = 60  # seconds; treat the token as expired a bit early
+
+def _token_exp(token):
+    """Read the exp claim (unix seconds) from a JWT, or None if it has none."""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)  # restore stripped base64 padding
+        return json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+    except (IndexError, ValueError):
+        return None
+
+def load_cached_token():
+    """Return the cached token if it is still valid, else None."""
+    try:
+        with open(TOKEN_CACHE_PATH) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() < cached.get('exp', 0) - TOKEN_EXPIRY_MARGIN:
+        return cached.get('token')
+    return None
+
+def save_cached_token(token):
+    """Persist the token with its expiry so later runs can skip the browser."""
+    exp = _token_exp(token)
+    if exp is None:
+        return
+    os.makedirs(os.path.dirname(TOKEN_CACHE_PATH), exist_ok=True)
+    # Create it owner-only up front so the token is never world-readable
+    fd = os.open(TOKEN_CACHE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'token': token, 'exp': exp}, f)
+
+def clear_cached_token():
+    """Drop the cached token, e.g. after the server rejected it."""
+    try:
+        os.remove(TOKEN_CACHE_PATH)
+    except FileNotFoundError:
+        pass
 
 def get_fresh_token():
     """Get fresh token by intercepting browser requests."""
+    # Imported here so warm runs that hit the token cache never load Selenium
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+    from selenium.webdriver.chrome.options import Options
+
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--user-data-dir=/tmp/chrome_profile")  # Persist login
@@ -42,25 +93,46 @@ def get_fresh_token():
     finally:
         driver.quit()
 
-def get_earnings_calendar():
-    """Get earnings calendar with fresh token."""
+def _get_fresh_token_or_raise():
+    """Get a token from the browser, raising if none could be captured."""
     print("Make sure you are logged in to Oquants in your browser before running this script.")
     token = get_fresh_token()
     if not token:
         raise Exception("Could not get fresh token")
+    return token
+
+def _request_earnings_calendar(token):
+    """Request the earnings calendar with the given bearer token."""
+    headers = {**BASE_HEADERS, 'Authorization': f'Bearer {token}'}
+    return requests.get(EARNINGS_CALENDAR_URL, headers=headers)
+
+def get_earnings_calendar():
+    """Get earnings calendar, using the cached token or a fresh one."""
+    token = load_cached_token()
+    from_cache = token is not None
+    if not from_cache:
+        token = _get_fresh_token_or_raise()
 
-    url = "https://api.oquants.com/api/v1/dashboard/earnings/earnings-calendar"
-    headers = {
-        'Authorization': f'Bearer {token}',
-        'Referer': 'https://oquants.com/',
-        'User-Agent': 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:138.0) Gecko/20100101 Firefox/138.0'
-    }
+    response = _request_earnings_calendar(token)
+    if from_cache and response.status_code in (401, 403):
+        # Cached token was revoked or rotated before its exp; get a new one and retry once
+        clear_cached_token()
+        token = _get_fresh_token_or_raise()
+        from_cache = False
+        response = _request_earnings_calendar(token)
 
-    response = requests.get(url, headers=headers)
     json_response = response.json()
     if not response.ok or 'data' not in json_response:
         raise Exception(f"Failed to fetch earnings calendar: {json_response.get('message', 'Unknown error')}")
-    return pd.json_normalize(json_response['data']['earnings_calendar'])
+    if not from_cache:
+        # Only cache a token the server has accepted
+        save_cached_token(token)
+    records = json_response['data']['earnings_calendar']
+    # Flat records map straight onto columns; only nested ones need json_normalize.
+    # Check every record, since a field can be null in one and nested in another.
+    if any(isinstance(v, (dict, list)) for record in records for v in record.values()):
+        return pd.json_normalize(records)
+    return pd.DataFrame(records)
 
 if __name__ == "__main__":
     try:
@@ -3,17 +3,16 @@ API Keys and Credentials
 """
 
 # Read from your CSV file
-import pandas as pd
+import csv
 import os
 
 def load_keys_from_csv():
     """Load keys from CSV file"""
     csv_path = os.path.join(os.path.dirname(__file__), 'keys.csv')
     if os.path.exists(csv_path):
-        df = pd.read_csv(csv_path)
-        # Assuming CSV has columns: key_name, key_value
-        keys = dict(zip(df['key'], df['value']))
-        return keys
+        # CSV has columns: key, value
+        with open(csv_path, newline='') as f:
+            return {row['key']: row['value'] for row in csv.DictReader(f)}
     return {}
 
 keys = load_keys_from_csv()
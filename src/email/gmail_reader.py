@@ -6,11 +6,12 @@ Much simpler than ProtonMail Bridge - just enable 2FA and create an App Password
 
 import imaplib
 import email
+import re
 from email.header import decode_header
 import sqlite3
 from datetime import datetime
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import sys
 import os
 # Add the src directory to Python path so we can import from credentials
@@ -20,6 +21,9 @@ from credentials.keys import GMAIL_EMAIL, GMAIL_APP_PASSWORD
 
 logger = logging.getLogger(__name__)
 
+# Pulls the UID out of a FETCH response envelope like b'12 (UID 345 BODY[HEADER] {1234}'
+UID_RE = re.compile(rb'UID (\d+)')
+
 class GmailReader:
     def __init__(self, email_address: str = GMAIL_EMAIL, app_password: str = GMAIL_APP_PASSWORD, db_path: str = 'gmail_emails.db'):
         """
@@ -42,6 +46,10 @@ class GmailReader:
     def setup_database(self):
         """Setup SQLite database"""
         self.db_conn = sqlite3.connect(self.db_path)
+        # WAL + NORMAL sync: one fsync per checkpoint instead of two per commit
+        self.db_conn.execute('PRAGMA journal_mode=WAL')
+        self.db_conn.execute('PRAGMA synchronous=NORMAL')
+        self.db_conn.execute('PRAGMA temp_store=MEMORY')
         cursor = self.db_conn.cursor()
         
         cursor.execute('''
@@ -85,7 +93,7 @@ class GmailReader:
     
     def get_emails(self, folder: str = 'INBOX', limit: int = 10, 
                    sender_filter: str = None, subject_filter: str = None,
-                   unread_only: bool = False) -> List[Dict[str, Any]]:
+                   unread_only: bool = False, fetch_body: bool = True) -> List[Dict[str, Any]]:
         """
         Get emails from Gmail
         
@@ -95,6 +103,9 @@ class GmailReader:
             sender_filter: Filter by sender email
             subject_filter: Filter by subject keyword (partial matching supported)
             unread_only: Only get unread emails
+            fetch_body: Download full messages (marks them read). If False, only headers
+                        are fetched, messages stay unread, body_text/body_html are ''
+                        (use get_body(uid) later) and store_emails won't save them
             
         Returns:
             List of email dictionaries
@@ -103,26 +114,13 @@ class GmailReader:
             # Select folder
             self.conn.select(folder)
             
-            # Build search criteria
-            search_criteria = []
-            
-            if unread_only:
-                search_criteria.append('UNSEEN')
-            
-            if sender_filter:
-                search_criteria.append(f'FROM "{sender_filter}"')
-            
-            if subject_filter:
-                # Support partial matching - IMAP will find subjects containing this text
-                search_criteria.append(f'SUBJECT "{subject_filter}"')
-            
             # Search for emails
-            if search_criteria:
-                search_query = '(' + ' '.join(search_criteria) + ')'
-            else:
-                search_query = 'ALL'
+            charset, search_criteria, literal = self._build_search(unread_only, sender_filter, subject_filter)
+            if literal is not None:
+                # imaplib sends this as a {n} literal after the last criterion
+                self.conn.literal = literal
             
-            status, messages = self.conn.search(None, search_query)
+            status, messages = self.conn.search(charset, *search_criteria)
             
             if status != 'OK':
                 logger.error(f"Search failed: {messages}")
@@ -135,29 +133,66 @@ class GmailReader:
             if limit:
                 message_ids = message_ids[-limit:]  # Get most recent
             
+            if not message_ids:
+                return []
+            
+            # Fetch all messages in a single round-trip, headers only unless bodies are wanted
+            fetch_items = '(UID RFC822)' if fetch_body else '(UID BODY.PEEK[HEADER])'
+            status, msg_data = self.conn.fetch(b','.join(message_ids), fetch_items)
+            
+            if status != 'OK':
+                logger.error(f"Fetch failed: {msg_data}")
+                return []
+            
+            # Response alternates (envelope, raw_email) tuples with b')' terminators
             emails = []
-            for msg_id in reversed(message_ids):  # Most recent first
-                email_data = self._parse_email(msg_id)
-                if email_data:
-                    emails.append(email_data)
+            for part in msg_data:
+                if isinstance(part, tuple):
+                    uid_match = UID_RE.search(part[0])
+                    uid = uid_match.group(1).decode() if uid_match else None
+                    email_data = self._parse_msg(part[1], uid, with_body=fetch_body)
+                    if email_data:
+                        emails.append(email_data)
             
+            emails.reverse()  # Most recent first
             return emails
             
         except Exception as e:
             logger.error(f"Error fetching emails: {e}")
             return []
     
-    def _parse_email(self, msg_id: bytes) -> Optional[Dict[str, Any]]:
-        """Parse a single email"""
+    def _build_search(self, unread_only: bool, sender_filter: Optional[str],
+                      subject_filter: Optional[str]) -> Tuple[Optional[str], Tuple[str, ...], Optional[bytes]]:
+        """
+        Build (charset, criteria, literal) for conn.search.
+        Non-ASCII subjects are sent as a UTF-8 literal since IMAP quoted strings are ASCII only.
+        """
+        search_criteria = []
+        charset = None
+        literal = None
+        
+        if unread_only:
+            search_criteria.append('UNSEEN')
+        
+        if sender_filter:
+            search_criteria.append(f'FROM "{sender_filter}"')
+        
+        if subject_filter:
+            # Support partial matching - IMAP will find subjects containing this text
+            if subject_filter.isascii():
+                search_criteria.append(f'SUBJECT "{subject_filter}"')
+            else:
+                # Must stay last: the literal follows the final criterion
+                search_criteria.append('SUBJECT')
+                charset = 'UTF-8'
+                literal = subject_filter.encode('utf-8')
+        
+        return charset, tuple(search_criteria) or ('ALL',), literal
+    
+    def _parse_msg(self, raw_email: bytes, uid: Optional[str] = None,
+                   with_body: bool = True) -> Optional[Dict[str, Any]]:
+        """Parse a single raw RFC822 email (or just its header block)"""
         try:
-            # Fetch email
-            status, msg_data = self.conn.fetch(msg_id, '(RFC822)')
-            
-            if status != 'OK':
-                return None
-            
-            # Parse email
-            raw_email = msg_data[0][1]
             msg = email.message_from_bytes(raw_email)
             
             # Extract basic info
@@ -168,9 +203,11 @@ class GmailReader:
             date = msg.get('Date', '')
             
             # Extract body
-            body_text, body_html = self._extract_body(msg)
+            body_text, body_html = self._extract_body(msg) if with_body else ('', '')
             
             return {
+                'uid': uid,
+                'headers_only': not with_body,
                 'message_id': message_id,
                 'from': from_addr,
                 'to': to_addr,
@@ -184,6 +221,27 @@ class GmailReader:
             logger.error(f"Error parsing email: {e}")
             return None
     
+    def get_body(self, msg_uid: str) -> Optional[tuple]:
+        """
+        Fetch the body of one message by UID (folder must already be selected)
+        
+        Returns:
+            (body_text, body_html), or None if the fetch failed
+        """
+        try:
+            # BODY.PEEK[] rather than [TEXT]: the top-level MIME headers are needed
+            # to split a multipart body, and PEEK leaves the message unread
+            status, msg_data = self.conn.uid('FETCH', msg_uid, '(BODY.PEEK[])')
+            
+            if status != 'OK' or not msg_data or not isinstance(msg_data[0], tuple):
+                return None
+            
+            return self._extract_body(email.message_from_bytes(msg_data[0][1]))
+            
+        except Exception as e:
+            logger.error(f"Error fetching body for UID {msg_uid}: {e}")
+            return None
+    
     def _decode_header(self, header: str) -> str:
         """Decode email header"""
         decoded_parts = decode_header(header)
@@ -246,19 +304,21 @@ class GmailReader:
     
     def store_emails(self, emails: List[Dict[str, Any]]) -> int:
         """Store emails in database"""
+        # Header-only results have empty bodies; INSERT OR IGNORE would keep those
+        # rows forever and block the real bodies from a later full fetch
+        headers_only = sum(1 for email_data in emails if email_data.get('headers_only'))
+        if headers_only:
+            logger.warning(f"Not storing {headers_only} header-only emails; fetch them with fetch_body=True")
+            emails = [email_data for email_data in emails if not email_data.get('headers_only')]
+        
         if not emails:
             return 0
         
-        cursor = self.db_conn.cursor()
-        stored_count = 0
-        
+        # A malformed email is logged and skipped rather than failing the batch
+        rows = []
         for email_data in emails:
             try:
-                cursor.execute('''
-                    INSERT OR IGNORE INTO emails 
-                    (message_id, from_address, to_address, subject, date, body_text, body_html)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
+                rows.append((
                     email_data['message_id'],
                     email_data['from'],
                     email_data['to'],
@@ -267,15 +327,26 @@ class GmailReader:
                     email_data['body_text'],
                     email_data['body_html']
                 ))
-                
-                if cursor.rowcount > 0:
-                    stored_count += 1
-                    
             except Exception as e:
                 logger.error(f"Error storing email: {e}")
         
-        self.db_conn.commit()
-        return stored_count
+        if not rows:
+            return 0
+        
+        try:
+            # One statement parse and one transaction for the whole batch
+            with self.db_conn:
+                cursor = self.db_conn.executemany('''
+                    INSERT OR IGNORE INTO emails 
+                    (message_id, from_address, to_address, subject, date, body_text, body_html)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+        except Exception as e:
+            logger.error(f"Error storing emails: {e}")
+            return 0
+        
+        # rowcount is summed over the batch; ignored duplicates count as 0
+        return cursor.rowcount
 
 
 # Example usage
@@ -290,6 +361,7 @@ def main():
     parser.add_argument('--subject', help='Filter by subject')
     parser.add_argument('--limit', type=int, default=10, help='Max emails to fetch')
     parser.add_argument('--unread', action='store_true', help='Only unread emails')
+    parser.add_argument('--headers-only', action='store_true', help='Only fetch headers (nothing is stored)')
     
     args = parser.parse_args()
     
@@ -304,14 +376,16 @@ def main():
             limit=args.limit,
             sender_filter=args.sender,
             subject_filter=args.subject,
-            unread_only=args.unread
+            unread_only=args.unread,
+            fetch_body=not args.headers_only
         )
         
         print(f"Found {len(emails)} emails")
         
-        # Store in database
-        stored = reader.store_emails(emails)
-        print(f"Stored {stored} new emails")
+        # Store in database (header-only results have no bodies to store)
+        if not args.headers_only:
+            stored = reader.store_emails(emails)
+            print(f"Stored {stored} new emails")
         
         # Display results
         for email in emails:
@@ -4,6 +4,8 @@ Finnhub API Client
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 from datetime import datetime
 from typing import List, Dict, Optional
@@ -26,6 +28,11 @@ class FinnhubClient:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'
         }
+        # Keep-alive session for sync calls, retrying rate limits and server errors with backoff
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retries))
     
     def get_earnings_calendar(self, from_date: str, to_date: str) -> pd.DataFrame:
         """
@@ -46,7 +53,7 @@ class FinnhubClient:
         }
         
         try:
-            response = requests.get(url, params=params, headers=self.headers)
+            response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
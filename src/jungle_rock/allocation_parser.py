@@ -253,14 +253,14 @@ class AllocationParser:
         Returns:
             Datetime object or None if parsing failed
         """
-        # Try various date formats
-        formats = [
-            '%a, %d %b %Y %H:%M:%S %z',  # RFC 2822 format
-            '%d %b %Y %H:%M:%S %z',
-            '%a, %d %b %Y %H:%M:%S',
-            '%Y-%m-%d %H:%M:%S',
-            '%Y-%m-%d'
-        ]
+        # Only try the formats that fit the string's shape, so the common
+        # RFC 2822 case doesn't raise and catch through the others
+        if ',' in date_str:
+            formats = ('%a, %d %b %Y %H:%M:%S %z', '%a, %d %b %Y %H:%M:%S')  # RFC 2822 format
+        elif date_str[4:5] == '-':
+            formats = ('%Y-%m-%d %H:%M:%S',) if ' ' in date_str else ('%Y-%m-%d',)
+        else:
+            formats = ('%d %b %Y %H:%M:%S %z',)
         
         for fmt in formats:
             try:
@@ -0,0 +1,127 @@
+"""
+Checks the NumPy volatility and term structure helpers in trade_rec_v2
+against the pandas / scipy implementations they replaced
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# trade_rec_v2 imports its siblings (ib_pool) as top-level modules
+sys.path.append(str(Path(__file__).parent.parent / 'src' / 'calendar_spread'))
+
+from trade_rec_v2 import _ffill, _interp_extrapolate, _rolling_sum, yang_zhang
+
+
+def reference_yang_zhang(price_data, window=30, trading_periods=252, return_last_only=True):
+    """
+    The original pandas implementation (fillna(method=...) spelled as ffill/bfill)
+    """
+    if price_data[['open', 'high', 'low', 'close']].isna().any().any():
+        price_data = price_data.ffill().bfill()
+
+    log_ho = np.log(price_data['high'] / price_data['open'])
+    log_lo = np.log(price_data['low'] / price_data['open'])
+    log_co = np.log(price_data['close'] / price_data['open'])
+    log_oc_sq = np.log(price_data['open'] / price_data['close'].shift(1))**2
+    log_cc_sq = np.log(price_data['close'] / price_data['close'].shift(1))**2
+    rs = log_ho * (log_ho - log_co) + log_lo * (log_lo - log_co)
+
+    close_vol = log_cc_sq.rolling(window=window).sum() * (1.0 / (window - 1.0))
+    open_vol = log_oc_sq.rolling(window=window).sum() * (1.0 / (window - 1.0))
+    window_rs = rs.rolling(window=window).sum() * (1.0 / (window - 1.0))
+
+    k = 0.34 / (1.34 + ((window + 1) / (window - 1)))
+    result = np.sqrt(open_vol + k * close_vol + (1 - k) * window_rs) * np.sqrt(trading_periods)
+
+    if return_last_only:
+        return result.iloc[-1]
+    return result.dropna()
+
+
+def make_ohlc(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = close * np.exp(rng.normal(0, 0.01, n))
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, 0.01, n)))
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=n),
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': rng.integers(1_000_000, 5_000_000, n),
+    })
+
+
+def with_gaps(df):
+    """Knock out leading, interior and trailing values in different columns"""
+    df = df.copy()
+    df.loc[0, 'open'] = np.nan
+    df.loc[:2, 'high'] = np.nan
+    df.loc[10:12, 'low'] = np.nan
+    df.loc[20, 'close'] = np.nan
+    df.loc[len(df) - 1, 'close'] = np.nan
+    df.loc[len(df) - 2:, 'high'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('window', [1, 5, 30])
+def test_rolling_sum_matches_pandas(window):
+    values = np.random.default_rng(1).normal(size=50)
+    expected = pd.Series(values).rolling(window).sum().dropna().to_numpy()
+    np.testing.assert_allclose(_rolling_sum(values, window), expected)
+
+
+def test_ffill_matches_pandas():
+    values = with_gaps(make_ohlc(40))[['open', 'high', 'low', 'close']]
+    arr = values.to_numpy(dtype=np.float64)
+
+    np.testing.assert_array_equal(_ffill(arr), values.ffill().to_numpy())
+    # the forward-then-backward fill used by yang_zhang
+    np.testing.assert_array_equal(_ffill(_ffill(arr)[::-1])[::-1], values.ffill().bfill().to_numpy())
+
+
+@pytest.mark.parametrize('gaps', [False, True])
+@pytest.mark.parametrize('n', [31, 60])
+def test_yang_zhang_last_matches_reference(n, gaps):
+    df = make_ohlc(n)
+    if gaps:
+        df = with_gaps(df)
+    assert yang_zhang(df) == pytest.approx(reference_yang_zhang(df), rel=1e-10)
+
+
+@pytest.mark.parametrize('gaps', [False, True])
+def test_yang_zhang_series_matches_reference(gaps):
+    df = make_ohlc(60)
+    if gaps:
+        df = with_gaps(df)
+    pd.testing.assert_series_equal(
+        yang_zhang(df, return_last_only=False),
+        reference_yang_zhang(df, return_last_only=False),
+        check_names=False,
+        rtol=1e-10,
+    )
+
+
+def test_yang_zhang_short_history_is_nan():
+    assert np.isnan(yang_zhang(make_ohlc(30), window=30))
+
+
+@pytest.mark.parametrize('dtes', [
+    [1, 8, 15],           # last expiration short of both 30 and 45 DTE
+    [3, 10, 24, 38],      # short of 45 only
+    [2, 9, 30, 45],       # points land exactly on knots
+    [5, 12, 33, 40, 44],
+])
+def test_interp_extrapolate_matches_interp1d(dtes):
+    interp1d = pytest.importorskip('scipy.interpolate').interp1d
+    ivs = list(np.random.default_rng(len(dtes)).uniform(0.2, 1.5, len(dtes)))
+    x = [dtes[0], 30, 45, 0, 60]
+
+    expected = interp1d(dtes, ivs, kind='linear', fill_value="extrapolate")(x)
+    np.testing.assert_allclose(_interp_extrapolate(x, dtes, ivs), expected)